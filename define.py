@@ -1,6 +1,8 @@
 import json
+import mmap
 import os
 import re
+from multiprocessing import Pool
 
 # compile_commands.json 파일 경로
 compile_commands_path = 'compile_commands.json'
@@ -11,33 +13,80 @@ parent_dir = os.path.abspath(os.path.join(os.getcwd(), '..'))
 # 상위 폴더의 .vscode 폴더 경로
 c_cpp_properties_path = os.path.join(parent_dir, '.vscode', 'c_cpp_properties.json')
 
+# JSON 객체를 만들지 않고 mmap 위에서 바로 "-D<이름>" 으로 시작하는 배열 원소를 스캔
+# (compile_commands.json에서 배열은 "arguments"뿐이고, JSON 문자열 안의 '"'는 항상
+#  이스케이프되므로 '[' 또는 ',' 바로 뒤의 '"'는 배열 원소의 시작이다.
+#  따라서 "command" 문자열 안의 -D 옵션은 잡히지 않는다.)
+define_pattern = re.compile(rb'[\[,]\s*"-D(\w+)')
 
+# 이 크기 이상의 compile_commands.json은 여러 프로세스로 나누어 스캔 (작은 파일은 Pool 시작 비용이 더 큼)
+PARALLEL_SCAN_THRESHOLD = 64 * 1024 * 1024
 
-# compile_commands.json 파일 읽기
-with open(compile_commands_path, 'r') as f:
-    compile_commands = json.load(f)
 
-# defines 추출
-defines = set()
-define_pattern = re.compile(r'-D(\w+)')
+def scan_defines(path, start, end):
+    """path의 [start, end) 구간에서 찾은 -D 이름(bytes) 집합을 반환"""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # findall()은 매치마다 Match 객체를 만들지 않음
+            return set(define_pattern.findall(mm, start, end))
 
-for command in compile_commands:
-    arguments = command.get('arguments', [])
-    for arg in arguments:
-        match = define_pattern.match(arg)
-        if match:
-            defines.add(match.group(1))
 
-# c_cpp_properties.json 파일 읽기
-with open(c_cpp_properties_path, 'r') as f:
-    c_cpp_properties = json.load(f)
+def split_scan_ranges(path, size, count):
+    """
+    파일을 count개 구간으로 나눔
+    경계는 "arguments" 키 위치에 맞추므로 하나의 -D 원소가 두 구간에 걸치지 않음
+    """
+    bounds = [0]
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for i in range(1, count):
+                pos = mm.find(b'"arguments"', max(size * i // count, bounds[-1]))
+                if pos < 0:
+                    break
+                bounds.append(pos)
+    bounds.append(size)
+    return [(path, start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
 
-# defines 추가
-for config in c_cpp_properties.get('configurations', []):
-    config['defines'] = list(defines)
 
-# c_cpp_properties.json 파일 쓰기
-with open(c_cpp_properties_path, 'w') as f:
-    json.dump(c_cpp_properties, f, indent=4)
+def extract_defines(path):
+    """compile_commands.json에서 -D로 지정된 define 이름 집합을 추출"""
+    size = os.path.getsize(path)
+    cpu_count = os.cpu_count() or 1
+    if size < PARALLEL_SCAN_THRESHOLD or cpu_count < 2:
+        names = scan_defines(path, 0, size)
+    else:
+        with Pool(cpu_count) as pool:
+            ranges = split_scan_ranges(path, size, cpu_count)
+            names = set().union(*pool.starmap(scan_defines, ranges))
+    # 중복 제거 후 한 번만 디코딩
+    return {name.decode('ascii') for name in names}
 
-print("c_cpp_properties.json 파일이 업데이트되었습니다.")
\ No newline at end of file
+
+def main():
+    # defines 추출
+    defines = extract_defines(compile_commands_path)
+
+    # c_cpp_properties.json 파일 읽기
+    with open(c_cpp_properties_path, 'r') as f:
+        c_cpp_properties = json.load(f)
+
+    # defines 추가 (변경된 경우에만)
+    changed = False
+    for config in c_cpp_properties.get('configurations', []):
+        if set(config.get('defines', [])) != defines:
+            config['defines'] = sorted(defines)
+            changed = True
+
+    # c_cpp_properties.json 파일 쓰기 (변경이 없으면 IntelliSense 재분석을 피하기 위해 쓰지 않음)
+    if changed:
+        with open(c_cpp_properties_path, 'w') as f:
+            json.dump(c_cpp_properties, f, indent=4)
+
+        print("c_cpp_properties.json 파일이 업데이트되었습니다.")
+    else:
+        print("c_cpp_properties.json 파일의 defines가 이미 최신 상태입니다.")
+
+
+# multiprocessing(spawn) 작업 프로세스가 이 모듈을 다시 import하므로 main()은 직접 실행할 때만 호출
+if __name__ == '__main__':
+    main()
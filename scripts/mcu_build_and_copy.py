@@ -16,7 +16,9 @@ import sys
 import argparse
 import time
 import shutil
+import stat
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Constants ---
 BUILD_AXON_FOLDER = 'build-axon'
@@ -27,6 +29,7 @@ MCU_BUILD_SUFFIX = os.path.join(
     'cortexm7-telechips-linux-musleabi', 'm7-1', '1.0.0-r0', 'git'
 )
 ROM_NAME = 'tcn100x_snor.rom'
+SEARCH_WORKERS = 8
 
 
 def parse_args(argv=None):
@@ -38,6 +41,15 @@ def parse_args(argv=None):
     parser.add_argument('--force-copy', action='store_true', help='Bypass the age timeout check and force copy the ROM')
     return parser.parse_args(argv)
 
+def iter_ancestors(path):
+    """Yield path and each of its parent directories up to the filesystem root."""
+    while True:
+        yield path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return
+        path = parent
+
 def find_build_axon(start_path):
     """
     Find the 'build-axon' directory by searching upwards from start_path,
@@ -46,45 +58,69 @@ def find_build_axon(start_path):
     abs_start_path = os.path.abspath(start_path)
 
     # 1. Search upwards (from current dir to root)
-    p = abs_start_path
-    parts = p.split(os.sep)
-    for i in range(len(parts), 0, -1):
-        candidate = os.sep.join(parts[:i])
-        if not candidate:
-            candidate = os.path.abspath(os.sep)
+    # One stat() per ancestor; a missing candidate is the common case.
+    for candidate in iter_ancestors(abs_start_path):
         build_axon_path = os.path.join(candidate, BUILD_AXON_FOLDER)
-        if os.path.isdir(build_axon_path):
-            return build_axon_path
+        try:
+            if stat.S_ISDIR(os.stat(build_axon_path).st_mode):
+                return build_axon_path
+        except OSError:
+            pass
 
     # 2. Search downwards (up to depth 2)
-    if os.path.isdir(os.path.join(abs_start_path, BUILD_AXON_FOLDER)):
-        return os.path.join(abs_start_path, BUILD_AXON_FOLDER)
+    # Sibling subtrees are probed concurrently: the readdir/stat calls release
+    # the GIL, so their latency overlaps on network filesystems (NFS/SMB).
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        return scan_build_axon(abs_start_path, 2, executor)
+
+def scan_build_axon(path, depth, executor=None):
+    """
+    Look for 'build-axon' inside path and, recursively, inside its
+    subdirectories down to the given depth. Returns None if not found.
+
+    Directory entries come from os.scandir(), so is_dir() is answered from the
+    directory listing instead of a stat() per entry. At depth 0 the candidate
+    is probed directly rather than listing the (possibly large) directory.
+    If an executor is given, the subdirectories of path are scanned in it;
+    results are still taken in listing order so the outcome is deterministic.
+    """
+    if depth == 0:
+        build_axon_path = os.path.join(path, BUILD_AXON_FOLDER)
+        return build_axon_path if os.path.isdir(build_axon_path) else None
+
+    subdirs = []
     try:
-        for d1_name in os.listdir(abs_start_path):
-            p1 = os.path.join(abs_start_path, d1_name)
-            if not os.path.isdir(p1):
-                continue
-            if os.path.isdir(os.path.join(p1, BUILD_AXON_FOLDER)):
-                return os.path.join(p1, BUILD_AXON_FOLDER)
-            try:
-                for d2_name in os.listdir(p1):
-                    p2 = os.path.join(p1, d2_name)
-                    if not os.path.isdir(p2):
-                        continue
-                    if os.path.isdir(os.path.join(p2, BUILD_AXON_FOLDER)):
-                        return os.path.join(p2, BUILD_AXON_FOLDER)
-            except PermissionError:
-                continue
+        with os.scandir(path) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+                if entry.name == BUILD_AXON_FOLDER:
+                    return entry.path
+                subdirs.append(entry.path)
     except PermissionError:
-        pass
-
+        return None
+
+    if executor is None:
+        results = (scan_build_axon(subdir, depth - 1) for subdir in subdirs)
+    else:
+        # Leaving the loop early closes the map() iterator, cancelling pending scans.
+        results = executor.map(scan_build_axon, subdirs, [depth - 1] * len(subdirs))
+    for found in results:
+        if found:
+            return found
     return None
 
 def run_make():
     """Run the 'make' command."""
     print("Running 'make'...")
+    # An absolute executable path, close_fds=False and no cwd/preexec_fn let
+    # subprocess use posix_spawn() instead of fork() + closing every fd.
+    make_path = shutil.which('make')
+    if not make_path:
+        print("Error: 'make' not found on PATH.", file=sys.stderr)
+        return 127
     try:
-        proc = subprocess.run(['make'], check=False)
+        proc = subprocess.run([make_path], check=False, close_fds=False, stdin=subprocess.DEVNULL)
         return proc.returncode
     except FileNotFoundError:
         print("Error: 'make' not found on PATH.", file=sys.stderr)
@@ -92,12 +128,39 @@ def run_make():
 
 def find_boot_dir(target):
     candidates = ['boot-firmware-tcn100x', 'boot-firmware_tcn100x']
+    # One directory listing instead of a stat() per candidate
+    found = {}
+    try:
+        with os.scandir(target) as it:
+            for entry in it:
+                if entry.name in candidates and entry.is_dir():
+                    found[entry.name] = entry.path
+    except OSError:
+        return None
     for cand in candidates:
-        cand_path = os.path.join(target, cand)
-        if os.path.isdir(cand_path):
-            return cand_path
+        if cand in found:
+            return found[cand]
     return None
 
+def copy_rom(src, dst):
+    """
+    Copy the ROM contents only (no metadata), letting the kernel do the copy
+    via copy_file_range() where available (reflink on btrfs/XFS).
+    """
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        if remaining == 0:
+            return
+    except (AttributeError, OSError):
+        pass
+    shutil.copyfile(src, dst)
+
 def check_and_copy_rom(build_axon_path, mcu_build_path, timeout, force_copy, dry_run=False):
     """
     Check if ROM exists and is recent, then copy it.
@@ -109,15 +172,16 @@ def check_and_copy_rom(build_axon_path, mcu_build_path, timeout, force_copy, dry
         return 7
 
     rom_path = os.path.join(boot_dir, ROM_NAME)
-    if not os.path.exists(rom_path):
+    try:
+        rom_stat = os.stat(rom_path)
+    except OSError:
         print(f"Error: {ROM_NAME} not found in {boot_dir}", file=sys.stderr)
         return 8
         
     if not force_copy:
         # Check if ROM is recent enough
         now = time.time()
-        mtime = os.path.getmtime(rom_path)
-        age = now - mtime
+        age = now - rom_stat.st_mtime
         if age > timeout:
             print(f"Error: {ROM_NAME} is too old ({age:.1f}s > {timeout}s)", file=sys.stderr)
             return 9
@@ -132,7 +196,7 @@ def check_and_copy_rom(build_axon_path, mcu_build_path, timeout, force_copy, dry
         return 0
         
     try:
-        shutil.copy2(rom_path, dest_path)
+        copy_rom(rom_path, dest_path)
         print(f"Successfully copied {ROM_NAME} to {dest_path}")
         return 0
     except Exception as e:
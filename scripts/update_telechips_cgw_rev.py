@@ -13,11 +13,50 @@ telechips-cgw-rev.inc 파일 업데이트 스크립트
 """
 import os
 import re
+import shutil
 import subprocess
 import sys
 from datetime import datetime
 
 
+# 레시피별 업데이트 대상 변수명
+# ⚠️ 실제 파일의 변수명 형식: *_BRANCH_DEV_SRC
+# 예: UBOOT_BRANCH_DEV_SRC ?= "${AUTOREV}"
+RECIPE_VAR_MAP = {
+    "linux-telechips": "KERNEL_BRANCH_DEV_SRC",
+    "m7-0": "MCU_BRANCH_DEV_SRC",
+    "m7-1": "MCU_BRANCH_DEV_SRC",
+    "m7-2": "MCU_BRANCH_DEV_SRC",
+    "m7-np": "MCU_BRANCH_DEV_SRC",
+    "dpi-app": "DPI_APP_BRANCH_DEV_SRC",
+    "tpa-app": "TPA_APP_BRANCH_DEV_SRC",
+    "u-boot-tcc": "UBOOT_BRANCH_DEV_SRC"
+}
+
+
+def read_git_head(src_tree_path):
+    """
+    .git 디렉토리에서 HEAD commit ID를 직접 읽음 (git 프로세스 실행 없음)
+
+    .git이 파일인 경우(worktree/submodule), ref가 packed-refs에만 있는 경우 등
+    직접 해석할 수 없으면 None을 반환하며, 이때는 git rev-parse를 사용
+    """
+    git_dir = os.path.join(src_tree_path, '.git')
+    if not os.path.isdir(git_dir):
+        return None
+    try:
+        with open(os.path.join(git_dir, 'HEAD'), 'r') as f:
+            head = f.read().strip()
+        if head.startswith('ref: '):
+            with open(os.path.join(git_dir, head[5:]), 'r') as f:
+                head = f.read().strip()
+    except OSError:
+        return None
+    if not re.match(r'^[0-9a-f]{40}([0-9a-f]{24})?$', head):
+        return None
+    return head
+
+
 def main():
     if len(sys.argv) != 4:
         print("❌ ERROR: 잘못된 인자 개수")
@@ -28,128 +67,133 @@ def main():
     SRC_TREE_PATH = sys.argv[2]
     INC_FILE = sys.argv[3]
 
+    # 1. 레시피별 변수명 결정
+    # 대상이 아닌 레시피는 파일 확인이나 git 실행 없이 바로 종료
+    TARGET_VAR = RECIPE_VAR_MAP.get(RECIPE_PN)
+
+    if not TARGET_VAR:
+        print(f"⚠️ 알림: '{RECIPE_PN}' 레시피는 telechips-cgw-rev.inc 자동 업데이트 대상이 아닙니다.")
+        sys.exit(0)
+
     print(f"🔍 Source Tree: {SRC_TREE_PATH}")
     print(f"🔍 Target Inc File: {INC_FILE}")
 
-    # 1. Git Commit ID 가져오기
+    # 2. Git Commit ID 가져오기
     if not os.path.isdir(SRC_TREE_PATH):
         print(f"❌ ERROR: 소스 디렉토리를 찾을 수 없습니다: {SRC_TREE_PATH}")
         sys.exit(1)
 
-    try:
-        # Python 3.6 호환: capture_output 대신 stdout, stderr 사용
-        result = subprocess.run(
-            ["git", "rev-parse", "HEAD"],
-            cwd=SRC_TREE_PATH,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,  # Python 3.6에서 text=True 대신 사용
-            check=True
-        )
-        COMMIT_ID = result.stdout.strip()
-        print(f"✅ Git Commit ID: {COMMIT_ID}")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ ERROR: Git commit ID를 가져올 수 없습니다: {e}")
-        sys.exit(1)
+    COMMIT_ID = read_git_head(SRC_TREE_PATH)
+    if not COMMIT_ID:
+        try:
+            # Python 3.6 호환: capture_output 대신 stdout, stderr 사용
+            # GIT_OPTIONAL_LOCKS=0: 읽기 전용 조회이므로 index.lock 등 선택적 잠금 생략
+            result = subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                cwd=SRC_TREE_PATH,
+                env=dict(os.environ, GIT_OPTIONAL_LOCKS='0'),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,  # Python 3.6에서 text=True 대신 사용
+                check=True
+            )
+            COMMIT_ID = result.stdout.strip()
+        except subprocess.CalledProcessError as e:
+            print(f"❌ ERROR: Git commit ID를 가져올 수 없습니다: {e}")
+            sys.exit(1)
+    print(f"✅ Git Commit ID: {COMMIT_ID}")
 
     if not os.path.isfile(INC_FILE):
         print(f"❌ ERROR: telechips-cgw-rev.inc 파일을 찾을 수 없습니다: {INC_FILE}")
         sys.exit(1)
 
-    # 2. 레시피별 변수명 결정
-    # ⚠️ 실제 파일의 변수명 형식: *_BRANCH_DEV_SRC
-    # 예: UBOOT_BRANCH_DEV_SRC ?= "${AUTOREV}"
-    TARGET_VAR = None
-    RECIPE_VAR_MAP = {
-        "linux-telechips": "KERNEL_BRANCH_DEV_SRC",
-        "m7-0": "MCU_BRANCH_DEV_SRC",
-        "m7-1": "MCU_BRANCH_DEV_SRC",
-        "m7-2": "MCU_BRANCH_DEV_SRC",
-        "m7-np": "MCU_BRANCH_DEV_SRC",
-        "dpi-app": "DPI_APP_BRANCH_DEV_SRC",
-        "tpa-app": "TPA_APP_BRANCH_DEV_SRC",
-        "u-boot-tcc": "UBOOT_BRANCH_DEV_SRC"
-    }
-
-    TARGET_VAR = RECIPE_VAR_MAP.get(RECIPE_PN)
-
-    if not TARGET_VAR:
-        print(f"⚠️ 알림: '{RECIPE_PN}' 레시피는 telechips-cgw-rev.inc 자동 업데이트 대상이 아닙니다.")
-        sys.exit(0)
-
     # 3. 파일 읽기 및 수정
     print(f"📝 {INC_FILE} 업데이트 체크 중...")
     print(f"   변수: {TARGET_VAR}")
 
+    # 패턴: TARGET_VAR = "${AUTOREV}" 또는 TARGET_VAR ?= "${AUTOREV}"
+    # 정규식으로 찾기 (공백, ?=, := 등 모두 허용)
+    # TARGET_VAR는 ASCII이므로 re.ASCII로 유니코드 문자 클래스 처리 생략
+    # 파일 전체에 re.MULTILINE으로 적용하므로 공백은 줄바꿈을 넘지 않도록 [ \t]만 허용
+    pattern = re.compile(
+        r'^([ \t]*)(' + re.escape(TARGET_VAR) + r')([ \t]*)([?:]?=)([ \t]*)"?\$\{AUTOREV\}"?(.*)$',
+        re.ASCII | re.MULTILINE
+    )
+
+    # 파일은 한 번만 읽고, 줄 단위 탐색은 모두 C 정규식 엔진에서 처리
     try:
         with open(INC_FILE, 'r', encoding='utf-8') as f:
             content = f.read()
-            lines = content.splitlines()
     except Exception as e:
         print(f"❌ ERROR: 파일을 읽을 수 없습니다: {e}")
         sys.exit(1)
 
-    # 패턴: TARGET_VAR = "${AUTOREV}" 또는 TARGET_VAR ?= "${AUTOREV}"
-    # 정규식으로 찾기 (공백, ?=, := 등 모두 허용)
-    pattern = re.compile(
-        r'^(\s*)(' + re.escape(TARGET_VAR) + r')(\s*)([?:]?=)(\s*)"?\$\{AUTOREV\}"?(.*)$'
-    )
-
-    updated = False
-    new_lines = []
-
-    for line in lines:
-        match = pattern.match(line)
-        if match:
-            # AUTOREV를 COMMIT_ID로 변경
-            indent = match.group(1)
-            var_name = match.group(2)
-            space1 = match.group(3)
-            operator = match.group(4)
-            space2 = match.group(5)
-            comment = match.group(6)
-            
-            new_line = f'{indent}{var_name} = "{COMMIT_ID}"{comment}'
-            new_lines.append(new_line)
-            
-            print('   현재 값이 "' + '${AUTOREV}"입니다. 업데이트를 진행합니다.')
-            print(f"   새로운 값: {COMMIT_ID}")
-            print(f"   이전: {line}")
-            print(f"   이후: {new_line}")
-            updated = True
+    if not pattern.search(content):
+        # 이미 업데이트된 경우 파일 쓰기 없이 종료
+        print(f'⚠️  업데이트 건너뜀: {TARGET_VAR}의 값이 "' + '${AUTOREV}"가 아닙니다.')
+        print("   현재 설정값:")
+        # 현재 설정값 출력
+        current = re.findall(r'^.*' + re.escape(TARGET_VAR) + r'.*$', content, re.MULTILINE)
+        if current:
+            # 줄마다 print()하지 않고 한 번에 출력
+            sys.stdout.write(''.join(f"   {line}\n" for line in current))
         else:
-            new_lines.append(line)
+            print("   (변수를 찾을 수 없습니다)")
+        return
+
+    # AUTOREV를 COMMIT_ID로 변경
+    # 줄 분리/결합 없이 파일 내용 전체에 한 번의 치환 (반복은 C 정규식 엔진에서 처리)
+    # 매치별 로그는 모아 두었다가 한 번에 출력
+    log = []
+
+    def replace_autorev(match):
+        indent = match.group(1)
+        var_name = match.group(2)
+        comment = match.group(6)
+
+        new_line = f'{indent}{var_name} = "{COMMIT_ID}"{comment}'
+
+        log.append('   현재 값이 "' + '${AUTOREV}"입니다. 업데이트를 진행합니다.')
+        log.append(f"   새로운 값: {COMMIT_ID}")
+        log.append(f"   이전: {match.group(0)}")
+        log.append(f"   이후: {new_line}")
+        return new_line
+
+    new_content = pattern.sub(replace_autorev, content)
+    sys.stdout.write('\n'.join(log) + '\n')
+
+    # 임시 파일에 쓴 뒤 원자적으로 교체
+    # - 임시 파일과 백업은 INC_FILE과 같은 디렉토리에 생성
+    #   (os.link()/os.replace()는 같은 파일시스템 안에서만 동작)
+    # - fsync는 하지 않음: 개발용 빌드 트리의 임시 파일/백업이므로 내구성보다 속도를 우선하고
+    #   OS 페이지 캐시에 맡김 (전원 장애 시 최근 변경이 유실될 수 있음)
+    tmp_file = f"{INC_FILE}.tmp"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+        shutil.copymode(INC_FILE, tmp_file)
 
-    if updated:
         # 백업 생성
+        # 기존 파일에 하드링크만 추가하고 새 파일로 교체하므로 기존 inode가 그대로 백업이 됨
+        # (하드링크를 지원하지 않는 파일시스템에서는 복사)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_file = f"{INC_FILE}.backup.{timestamp}"
         try:
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+            try:
+                os.link(INC_FILE, backup_file)
+            except OSError:
+                shutil.copyfile(INC_FILE, backup_file)
             print(f"   백업 생성: {backup_file}")
         except Exception as e:
             print(f"⚠️ 백업 생성 실패: {e}")
-        
-        # 파일 쓰기
-        try:
-            with open(INC_FILE, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(new_lines) + '\n')
-            print(f"✅ 업데이트 완료: {TARGET_VAR} = {COMMIT_ID}")
-        except Exception as e:
-            print(f"❌ ERROR: 파일 쓰기 실패: {e}")
-            sys.exit(1)
-    else:
-        print(f'⚠️  업데이트 건너뜀: {TARGET_VAR}의 값이 "' + '${AUTOREV}"가 아닙니다.')
-        print("   현재 설정값:")
-        # 현재 설정값 출력
-        found = False
-        for line in lines:
-            if TARGET_VAR in line:
-                print(f"   {line}")
-                found = True
-        if not found:
-            print("   (변수를 찾을 수 없습니다)")
+
+        os.replace(tmp_file, INC_FILE)
+        print(f"✅ 업데이트 완료: {TARGET_VAR} = {COMMIT_ID}")
+    except Exception as e:
+        print(f"❌ ERROR: 파일 쓰기 실패: {e}")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        sys.exit(1)
 
 
 if __name__ == "__main__":